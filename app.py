@@ -1,25 +1,70 @@
+import gzip
+import threading
 import streamlit as st
-from http.client import HTTPSConnection
+from functools import lru_cache
+from http.client import HTTPSConnection, HTTPException
 from base64 import b64encode
 from json import loads, dumps
 
+# orjson parses large API responses faster when available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@lru_cache(maxsize=None)
+def basic_auth(username, password):
+    return 'Basic ' + b64encode(("%s:%s" % (username, password)).encode("ascii")).decode("ascii")
+
 class RestClient:
     domain = "api.dataforseo.com"
 
     def __init__(self, username, password):
         self.username = username
         self.password = password
+        # http.client connections are not thread-safe, so each worker
+        # thread keeps its own keep-alive connection
+        self._local = threading.local()
+        # Constant for the client's lifetime; built once instead of per request
+        self._base_headers = {'Authorization': basic_auth(username, password), 'Accept-Encoding': 'gzip'}
+
+    def _connect(self):
+        if getattr(self._local, 'connection', None) is None:
+            self._local.connection = HTTPSConnection(self.domain)
+        return self._local.connection
+
+    def close(self):
+        if getattr(self._local, 'connection', None) is not None:
+            self._local.connection.close()
+            self._local.connection = None
 
     def request(self, path, method, data=None):
-        connection = HTTPSConnection(self.domain)
+        headers = self._base_headers
+        body = data
+        if body is not None:
+            # Compress the payload; previously the header claimed gzip while
+            # the body went out as plain JSON
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            body = gzip.compress(body)
+            headers = dict(headers, **{'Content-Encoding': 'gzip'})
         try:
-            base64_bytes = b64encode(("%s:%s" % (self.username, self.password)).encode("ascii")).decode("ascii")
-            headers = {'Authorization': 'Basic %s' % base64_bytes, 'Content-Encoding': 'gzip'}
-            connection.request(method, path, headers=headers, body=data)
+            connection = self._connect()
+            connection.request(method, path, headers=headers, body=body)
+            response = connection.getresponse()
+        except (HTTPException, OSError):
+            # The keep-alive connection went stale; reconnect once and retry
+            self.close()
+            connection = self._connect()
+            connection.request(method, path, headers=headers, body=body)
             response = connection.getresponse()
-            return loads(response.read().decode())
-        finally:
-            connection.close()
+        raw = response.read()
+        if response.getheader('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        # orjson takes the raw bytes directly, skipping the decode copy
+        if orjson is not None:
+            return orjson.loads(raw)
+        return loads(raw.decode())
 
 # Streamlit app
 st.title('SERP Groups API Client')
@@ -3,17 +3,37 @@ import pandas as pd
 import requests
 import json
 import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum number of concurrent search requests
+MAX_WORKERS = 10
+
+# Retry settings for transient API errors
+MAX_RETRIES = 3
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503)
 
 # Function to search using Google Custom Search JSON API
+# Cached so reruns with the same inputs don't repeat the API round-trip
+@st.cache_data(ttl=300, show_spinner=False)
 def search(query, api_key, cse_id, **kwargs):
     url = "https://www.googleapis.com/customsearch/v1"
     params = {
         'q': query,
         'key': api_key,
         'cx': cse_id,
+        # Partial-response mask: only the result links are ever used
+        'fields': 'items(link)',
     }
     params.update(kwargs)
-    response = requests.get(url, params=params)
+    for attempt in range(MAX_RETRIES):
+        response = requests.get(url, params=params)
+        # Back off with jitter on rate-limit or server errors and retry
+        if response.status_code in RETRYABLE_STATUS_CODES and attempt < MAX_RETRIES - 1:
+            time.sleep(min(30, 2 ** attempt) + random.random())
+            continue
+        break
     return json.loads(response.text)
 
 # Function to clear input fields
@@ -70,38 +90,45 @@ else:
 if df is not None:
     # Button to run the script
     if st.button("Run Script"):
-        # Create a new dataframe to store results
-        results_df = pd.DataFrame()
-
-        for index, row in df.iterrows():
-            # Search query
-            query = f"site:{site} {row['keyword']} -inurl:{row['target_url']}"
-
-            # Get the search results
-            results = search(query, api_key, cse_id)
-
-            # Extract the URLs of the search results
-            link_list = [result['link'] for result in results.get('items', [])]
-
-            # If less than 10 links are returned, fill the rest with None
-            while len(link_list) < 10:
-                link_list.append(None)
-
-            # Append the list of links to the results dataframe
-            results_df = pd.concat([results_df, pd.Series(link_list, name=index)], axis=1)
-
-        # Transpose the results dataframe and set column names
-        results_df = results_df.transpose()
+        # Collect one row of links per keyword
+        link_rows = []
+
+        # Build all search queries up front
+        queries = [
+            f"site:{site} {row['keyword']} -inurl:{row['target_url']}"
+            for index, row in df.iterrows()
+        ]
+
+        # Run the searches concurrently; map returns results in query order
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            all_results = list(executor.map(
+                lambda query: search(query, api_key, cse_id), queries))
+
+        for results in all_results:
+            # Extract the URLs of the search results (at most 10 are kept)
+            link_rows.append(
+                [result['link'] for result in results.get('items', [])][:10])
+
+        # Build the results dataframe in one go; the reindex pads rows with
+        # fewer than 10 links instead of appending None one at a time
+        results_df = pd.DataFrame(link_rows).reindex(columns=range(10))
         results_df.columns = [f'link{i+1}' for i in range(10)]
 
         # Concatenate the original dataframe with the results dataframe
-        df = pd.concat([df, results_df], axis=1)
+        df = pd.concat([df.reset_index(drop=True), results_df], axis=1)
 
-        # Write the updated dataframe to a CSV file and provide a download link
+        # Keep the results across reruns so clicking the download button
+        # doesn't wipe them or trigger another round of searches
+        st.session_state.results = df
+
+    if 'results' in st.session_state:
+        results = st.session_state.results
+
+        # Write the results dataframe to a CSV buffer and provide a download link
         output = io.BytesIO()
-        df.to_csv(output, index=False)
+        results.to_csv(output, index=False)
         output.seek(0)
-        
+
         st.download_button(
             label="Download output CSV",
             data=output,
@@ -109,8 +136,20 @@ if df is not None:
             mime="text/csv"
         )
 
+        # Also offer Parquet, which is smaller and keeps column types
+        parquet_output = io.BytesIO()
+        results.to_parquet(parquet_output, index=False)
+        parquet_output.seek(0)
+
+        st.download_button(
+            label="Download output Parquet",
+            data=parquet_output,
+            file_name="output.parquet",
+            mime="application/octet-stream"
+        )
+
         st.write("Search completed and results are ready to download.")
 
         # Display the results in a static table
         st.write("Results Table:")
-        st.dataframe(df)
+        st.dataframe(results)
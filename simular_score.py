@@ -1,27 +1,46 @@
 import torch
+from functools import lru_cache
 from transformers import BertTokenizer, BertModel
 from sklearn.metrics.pairwise import cosine_similarity
 import streamlit as st
 
-# Function to get the embedding of a text using BERT
-def get_embedding(text, model, tokenizer):
+# Load tokenizer and model once per process and warm them up
+@st.cache_resource
+def load_model():
+    tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+    model = BertModel.from_pretrained('bert-base-uncased')
+    model.eval()
+    # Dummy forward pass so the first real request doesn't pay the
+    # lazy initialization cost
+    with torch.no_grad():
+        model(**tokenizer("warmup", return_tensors='pt'))
+    return tokenizer, model
+
+# Cache embeddings per input string so a repeated sentence or keyword skips
+# the whole BERT forward pass, not just tokenization
+@lru_cache(maxsize=1024)
+def embed(text):
+    tokenizer, model = load_model()
     inputs = tokenizer(text, return_tensors='pt')
     outputs = model(**inputs)
     return outputs.last_hidden_state.mean(dim=1).detach().numpy()
 
+# Function to get the embedding of a text using BERT
+def get_embedding(text, model, tokenizer):
+    return embed(text)
+
 # Main function for the Streamlit app
 def main():
     st.title("Sentence and Keyword Similarity with BERT")
-    
+
+    # Load tokenizer and model up front so typing doesn't trigger a cold start
+    tokenizer, model = load_model()
+
     # Text input fields for sentence and keyword
     sentence = st.text_input("Sentence:")
     keyword = st.text_input("Keyword:")
-    
-    if sentence and keyword:
-        # Load tokenizer and model
-        tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-        model = BertModel.from_pretrained('bert-base-uncased')
 
+    if sentence and keyword:
         # Get embeddings for sentence and keyword
         sentence_embedding = get_embedding(sentence, model, tokenizer)
         keyword_embedding = get_embedding(keyword, model, tokenizer)
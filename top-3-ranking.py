@@ -4,19 +4,49 @@ class RestClient:
     def __init__(self, username, password):
         self.username = username
         self.password = password
+        # http.client connections are not thread-safe, so each worker
+        # thread keeps its own keep-alive connection
+        self._local = threading.local()
+        # Constant for the client's lifetime; built once instead of per request
+        self._base_headers = {'Authorization': basic_auth(username, password), 'Accept-Encoding': 'gzip'}
+
+    def _connect(self):
+        if getattr(self._local, 'connection', None) is None:
+            self._local.connection = HTTPSConnection(self.domain)
+        return self._local.connection
+
+    def close(self):
+        if getattr(self._local, 'connection', None) is not None:
+            self._local.connection.close()
+            self._local.connection = None
 
     def request(self, path, method, data=None):
-        connection = HTTPSConnection(self.domain)
+        headers = self._base_headers
+        body = data
+        if body is not None:
+            # Compress the payload; previously the header claimed gzip while
+            # the body went out as plain JSON
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            body = gzip.compress(body)
+            headers = dict(headers, **{'Content-Encoding': 'gzip'})
         try:
-            base64_bytes = b64encode(
-                ("%s:%s" % (self.username, self.password)).encode("ascii")
-            ).decode("ascii")
-            headers = {'Authorization': 'Basic %s' % base64_bytes, 'Content-Encoding': 'gzip'}
-            connection.request(method, path, headers=headers, body=data)
+            connection = self._connect()
+            connection.request(method, path, headers=headers, body=body)
+            response = connection.getresponse()
+        except (HTTPException, OSError):
+            # The keep-alive connection went stale; reconnect once and retry
+            self.close()
+            connection = self._connect()
+            connection.request(method, path, headers=headers, body=body)
             response = connection.getresponse()
-            return loads(response.read().decode())
-        finally:
-            connection.close()
+        raw = response.read()
+        if response.getheader('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        # orjson takes the raw bytes directly, skipping the decode copy
+        if orjson is not None:
+            return orjson.loads(raw)
+        return loads(raw.decode())
 
     def get(self, path):
         return self.request(path, 'GET')
@@ -24,68 +54,216 @@ class RestClient:
     def post(self, path, data):
         if isinstance(data, str):
             data_str = data
+        elif orjson is not None:
+            data_str = orjson.dumps(data)
         else:
             data_str = dumps(data)
         return self.request(path, 'POST', data_str)
 
 
+import asyncio
+import csv
+import gzip
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+import numpy as np
 import streamlit as st
 import pandas as pd
-from http.client import HTTPSConnection
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from http.client import HTTPSConnection, HTTPException
 from base64 import b64encode
 from json import loads, dumps
 
-def get_data(keyword, client, location_code, language_code, device, domain, num_results):
-    post_data = {
-        "data": [
-            {
-                "keyword": keyword,
-                "location_code": location_code,
-                "language_code": language_code,
-                "device": device,
-                "se_domain": domain,
-                "num_results": num_results
-            }
-        ]
+# aiohttp is optional; without it the keyword requests run sequentially
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# orjson parses the multi-MB SERP responses 2-3x faster when available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# numba compiles the analysis counting kernel to machine code when available
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _dedup_and_count(sorted_urls, sorted_kws, n_urls):
+        # One pass over the lexsorted code pairs: mark first occurrences and
+        # tally unique keywords per url
+        n = len(sorted_urls)
+        first = np.empty(n, dtype=np.bool_)
+        counts = np.zeros(n_urls, dtype=np.int32)
+        for i in range(n):
+            is_first = (i == 0 or sorted_urls[i] != sorted_urls[i - 1]
+                        or sorted_kws[i] != sorted_kws[i - 1])
+            first[i] = is_first
+            if is_first:
+                counts[sorted_urls[i]] += 1
+        return first, counts
+
+# Below the import block on purpose: the decorator runs at definition time,
+# unlike RestClient above, which only touches its imports at call time
+@lru_cache(maxsize=None)
+def basic_auth(username, password):
+    return 'Basic ' + b64encode(("%s:%s" % (username, password)).encode("ascii")).decode("ascii")
+
+SERP_PATH = "/v3/serp/google/organic/live/advanced"
+
+# DataForSEO accepts up to 100 tasks per POST
+BATCH_SIZE = 100
+
+# Below this many result rows, plain dict counting beats the pandas machinery
+SMALL_RESULTS = 10_000
+
+def build_tasks(keywords, location_code, language_code, device, domain, num_results):
+    # One base dict copied per keyword instead of six key inserts each
+    base = {
+        "location_code": location_code,
+        "language_code": language_code,
+        "device": device,
+        "se_domain": domain,
+        "num_results": num_results
     }
-    response = client.post("/v3/serp/google/organic/live/advanced", post_data)
-    if response["status_code"] == 20000:
+    return [dict(base, keyword=keyword) for keyword in keywords]
+
+def batch_keywords(keywords):
+    # Tuples so each batch is hashable for st.cache_data
+    return [tuple(keywords[i:i + BATCH_SIZE]) for i in range(0, len(keywords), BATCH_SIZE)]
+
+async def fetch_all_keywords(keywords, username, password, location_code, language_code, device, domain, num_results):
+    # One TLS session shared by every request instead of a handshake per batch
+    auth = aiohttp.BasicAuth(username, password)
+    connector = aiohttp.TCPConnector(limit=32)
+    url = "https://%s%s" % (RestClient.domain, SERP_PATH)
+
+    async def fetch(session, batch):
+        post_data = {"data": build_tasks(batch, location_code, language_code, device, domain, num_results)}
+        async with session.post(url, json=post_data) as response:
+            return await response.json()
+
+    async with aiohttp.ClientSession(auth=auth, connector=connector) as session:
+        return await asyncio.gather(*(fetch(session, batch) for batch in batch_keywords(keywords)))
+
+def extract_items(response):
+    # Returns (items, error messages); errors are reported by the caller in
+    # one go rather than triggering a re-render per failed task
+    if response["status_code"] != 20000:
+        return [], ["Error: " + response["status_message"]]
+
+    tasks = response.get("tasks", [])
+    if not tasks:
+        return [], ["No tasks found in the response"]
+
+    items = []
+    errors = []
+    for task in tasks:
+        keyword = (task.get("data") or {}).get("keyword", "")
         try:
-            tasks = response.get("tasks", [])
-            if not tasks:
-                st.error(f"No tasks found in the response for keyword: {keyword}")
-                return []
-            
-            task_results = tasks[0].get("result", [])
+            task_results = task.get("result", [])
             if not task_results:
-                st.error(f"No results found in the task for keyword: {keyword}")
-                return []
+                errors.append(f"No results found in the task for keyword: {keyword}")
+                continue
+            # Project each item down to the fields the analysis and export
+            # actually use; the full SERP records are dozens of fields wide
+            items.extend(
+                {"url": it.get("url"), "keyword": it.get("keyword", keyword), "rank": it.get("rank_group")}
+                for it in task_results[0].get("items", []))
+        except (IndexError, KeyError, TypeError) as e:
+            errors.append(f"Error processing response for keyword: {keyword}. Error: {str(e)}")
+    return items, errors
 
-            return task_results[0].get("items", [])
-        except (IndexError, KeyError) as e:
-            st.error(f"Error processing response for keyword: {keyword}. Error: {str(e)}")
-            return []
-    else:
-        st.error("Error: " + response["status_message"])
-        return []
+def get_data_batch(batch, client, location_code, language_code, device, domain, num_results):
+    post_data = {"data": build_tasks(batch, location_code, language_code, device, domain, num_results)}
+    response = client.post(SERP_PATH, post_data)
+    return extract_items(response)
+
+# Cached on the keywords and query params so identical runs skip the paid
+# API calls on either transport; the credentials carry a leading underscore
+# to stay out of the cache key
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_serp_results(keywords, _username, _password, location_code, language_code, device, domain, num_results):
+    if aiohttp is not None:
+        # Fan the batched requests out concurrently over one shared session
+        responses = asyncio.run(fetch_all_keywords(
+            keywords, _username, _password, location_code, language_code, device, domain, num_results))
+        return [extract_items(response) for response in responses]
+
+    # Threaded fan-out: http.client releases the GIL during socket IO,
+    # and each worker gets its own connection via RestClient
+    client = RestClient(_username, _password)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return list(pool.map(
+            lambda batch: get_data_batch(batch, client, location_code, language_code, device, domain, num_results),
+            batch_keywords(keywords)))
 
+# Pure function of the results list, so reruns with identical data hit the cache
+@st.cache_data(show_spinner=False)
 def analyze_results(results):
     if not results:
         st.warning("No results to analyze.")
         return pd.DataFrame()
 
-    data = {
-        "url": [],
-        "keyword": []
-    }
-    
-    for item in results:
-        data["url"].append(item["url"])
-        data["keyword"].append(item["keyword"])
-
-    df = pd.DataFrame(data)
-    analysis_df = df.groupby('url').agg({'keyword': lambda x: list(set(x))})
-    analysis_df['count'] = analysis_df['keyword'].str.len()
+    # For small result sets, count deduped (url, keyword) pairs directly;
+    # pandas only enters for the final display frame
+    if len(results) < SMALL_RESULTS:
+        seen = set()
+        counts = Counter()
+        keywords_by_url = defaultdict(list)
+        for item in results:
+            pair = (item["url"], item["keyword"])
+            if pair in seen:
+                continue
+            seen.add(pair)
+            counts[item["url"]] += 1
+            keywords_by_url[item["url"]].append(item["keyword"])
+
+        ordered = counts.most_common()
+        return pd.DataFrame(
+            {'keyword': [keywords_by_url[url] for url, _ in ordered],
+             'count': np.array([count for _, count in ordered], dtype=np.int32)},
+            index=pd.Index([url for url, _ in ordered], name='url'))
+
+    # Let pandas pull the two columns straight from the result records
+    df = pd.DataFrame(results, columns=["url", "keyword"])
+
+    # Factorize both columns to int codes and dedup (url, keyword) pairs
+    # with a lexsort + first-occurrence mask, all in C
+    url_codes, unique_urls = pd.factorize(df['url'])
+    kw_codes, unique_kws = pd.factorize(df['keyword'])
+    order = np.lexsort((kw_codes, url_codes))
+    sorted_urls = url_codes[order]
+    sorted_kws = kw_codes[order]
+    if njit is not None:
+        first, counts = _dedup_and_count(sorted_urls, sorted_kws, len(unique_urls))
+    else:
+        first = np.ones(len(sorted_urls), dtype=bool)
+        first[1:] = (sorted_urls[1:] != sorted_urls[:-1]) | (sorted_kws[1:] != sorted_kws[:-1])
+        counts = None
+    dedup_urls = sorted_urls[first]
+    dedup_kws = sorted_kws[first]
+    if counts is None:
+        counts = np.bincount(dedup_urls, minlength=len(unique_urls)).astype(np.int32)
+
+    # The deduped rows are grouped by url code, so splitting at the code
+    # boundaries yields each url's unique keywords and bincount its count
+    kw_values = np.asarray(unique_kws)
+    boundaries = np.flatnonzero(np.diff(dedup_urls)) + 1
+    keyword_lists = [kw_values[chunk] for chunk in np.split(dedup_kws, boundaries)]
+
+    analysis_df = pd.DataFrame(
+        {'keyword': keyword_lists, 'count': counts},
+        index=pd.Index(unique_urls, name='url'))
     analysis_df.sort_values(by='count', ascending=False, inplace=True)
     return analysis_df
 
@@ -95,28 +273,62 @@ st.title("SEO Data Analysis")
 username = st.text_input("API Username")
 password = st.text_input("API Password", type="password")
 domain = st.text_input("Domain", value="anya.health")
-location = st.text_input("Location Code", value="2840")  # Example: 2840 for United Kingdom
+location = st.number_input("Location Code", value=2840)  # Example: 2840 for United States
 language = st.text_input("Language Code", value="en")  # Example: en for English
 device = st.selectbox("Device", ["desktop", "mobile"], index=1)
 num_results = st.number_input("Number of Results", min_value=1, value=3)
-keywords = st.text_area("Keywords (one per line)").split('\n')
+# Cleaned once here: splitlines also copes with \r\n pastes, and the tuple
+# is hashable for the st.cache_data-backed fetch
+keywords = tuple(filter(None, map(str.strip, st.text_area("Keywords (one per line)").splitlines())))
 
 if st.button("Run Analysis"):
-    client = RestClient(username, password)
-    all_data = []
-
-    for keyword in keywords:
-        if keyword.strip():
-            data = get_data(keyword.strip(), client, location, language, device, domain, num_results)
-            all_data.extend(data)
-    
+    extracted = fetch_serp_results(keywords, username, password, location, language, device, domain, num_results)
+
+    # Flatten once and surface any per-task errors in a single element
+    all_data = list(chain.from_iterable(items for items, _ in extracted))
+    errors = list(chain.from_iterable(errs for _, errs in extracted))
+    if errors:
+        st.error("\n".join(errors))
+
     if all_data:
-        df = pd.DataFrame(all_data)
-        st.write("Raw Results", df)
-        df.to_csv("output.csv", index=False)
-        st.success("Raw analysis complete and saved to output.csv")
+        # Stream the raw rows straight to disk instead of building a full
+        # DataFrame just to serialize it
+        with open("output.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(all_data[0].keys()), extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(all_data)
 
         analysis_df = analyze_results(all_data)
-        st.write("Analysis Results", analysis_df)
-        analysis_df.to_csv("most_common.csv")
-        st.success("Analysis complete and saved to most_common.csv")
+
+        # Write through pyarrow's C++ CSV writer; keyword lists are joined
+        # into one cell since the writer has no nested-list support
+        export_df = analysis_df.reset_index()
+        export_df['keyword'] = [', '.join(kws) for kws in export_df['keyword']]
+        export_table = pa.Table.from_pandas(export_df, preserve_index=False)
+        pacsv.write_csv(export_table, "most_common.csv")
+
+        # Also produce a gzipped copy for sharing; arrow streams the CSV
+        # through its gzip codec in C++
+        gz_buffer = pa.BufferOutputStream()
+        with pa.CompressedOutputStream(gz_buffer, "gzip") as gz_stream:
+            pacsv.write_csv(export_table, gz_stream)
+
+        # Keep the results across reruns so unrelated widget interactions
+        # don't re-fetch every keyword
+        st.session_state.raw_preview = pd.DataFrame(all_data[:1000])
+        st.session_state.analysis_df = analysis_df
+        st.session_state.analysis_csv_gz = gz_buffer.getvalue().to_pybytes()
+
+if 'analysis_df' in st.session_state:
+    st.write("Raw Results", st.session_state.raw_preview)
+    st.success("Raw analysis complete and saved to output.csv")
+
+    st.write("Analysis Results", st.session_state.analysis_df)
+    st.success("Analysis complete and saved to most_common.csv")
+
+    st.download_button(
+        label="Download analysis (gzipped CSV)",
+        data=st.session_state.analysis_csv_gz,
+        file_name="most_common.csv.gz",
+        mime="application/gzip"
+    )